@@ -1,142 +1,554 @@
-import requests
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from contextlib import closing
+import aiohttp
+from aiolimiter import AsyncLimiter
+import ijson
+import orjson
+import bottleneck as bn
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timezone
+import matplotlib
+from numba import njit
+
+# with no display server there's no GUI to show plots in, so skip initializing one and only render to files
+HEADLESS = sys.platform.startswith('linux') and not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+if HEADLESS:
+    matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-import time
 
-# fetches a player's rating history from Chess.com API
-def get_player_stats(username):
+# uvloop's libuv event loop does less work per socket operation than asyncio's default one;
+# it isn't available everywhere (e.g. Windows), so fall back to asyncio's loop without it
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate'
+}
+
+# maximum number of archive requests in flight at once; keeps us within Chess.com's rate limits
+MAX_CONCURRENT_REQUESTS = 8
+# keep-alive connections kept open to api.chess.com
+POOL_SIZE = 16
+
+# token bucket pacing every async API call; lets short bursts through and throttles the tail
+RATE_LIMIT = 30
+RATE_PERIOD = 60
+
+# transient failures (these statuses, connection/read errors and timeouts) are retried with exponential backoff
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+
+# stats and archive lists already fetched by this process, keyed by lowercased username
+PLAYER_STATS_CACHE = {}
+
+# on-disk cache of API responses, keyed by url
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.chesscom_cache')
+CACHE_DB = os.path.join(CACHE_DIR, 'http_cache.sqlite')
+# the current month's archive, stats and archive lists change; cache them for an hour
+SHORT_TTL = 3600
+
+# initial number of games buffered per archive before the buffers are grown
+ARCHIVE_BUFFER_SIZE = 256
+
+# the raw rating series is downsampled to at most this many points before plotting
+MAX_PLOT_POINTS = 2000
+
+# games processed by earlier runs are kept per player in CACHE_DIR as {username}.parquet,
+# with {username}.json recording, per archive month, the newest stored game and whether
+# the archive was fetched after the month ended (and so can never gain more games)
+# stored with narrow dtypes: there are only a few dozen distinct time controls across any history
+HISTORY_DTYPES = {'end_time': 'int64', 'rating': 'int32', 'time_control': 'category'}
+
+
+def run_async(coro):
+    # runs a coroutine to completion on uvloop when installed, otherwise on asyncio's default loop
+    loop_factory = uvloop.new_event_loop if uvloop is not None else None
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        return runner.run(coro)
+
+
+def open_session():
+    # one pooled keep-alive session shared by every async request in a run
+    return aiohttp.ClientSession(headers=HEADERS, connector=aiohttp.TCPConnector(limit=POOL_SIZE))
+
+
+def open_limiter():
+    # created per run, like the session: the limiter binds to the event loop it's first used on
+    return AsyncLimiter(max_rate=RATE_LIMIT, time_period=RATE_PERIOD)
+
+
+def open_cache():
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cache = sqlite3.connect(CACHE_DB)
+    cache.execute('CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, fetched_at REAL, body BLOB)')
+    return cache
+
+
+def archive_month(url):
+    # (year, month) of a monthly archive url, or None for any other endpoint
+    match = re.search(r'/games/(\d{4})/(\d{2})$', url)
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def month_bounds(year, month):
+    # unix timestamps of the start of the month and of the start of the next month
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+    return int(start.timestamp()), int(end.timestamp())
+
+
+def cache_ttl(url, fetched_at):
+    # archives of past months are immutable and never expire, but only a copy fetched after the
+    # month ended is complete; one fetched while the month was still running expires like any other
+    month = archive_month(url)
+    if month and fetched_at >= month_bounds(*month)[1]:
+        return None
+    return SHORT_TTL
+
+
+def cache_get(cache, url):
+    # returns (cached response body, time it was fetched) for url, or (None, None) if missing or expired
+    row = cache.execute('SELECT fetched_at, body FROM responses WHERE url = ?', (url,)).fetchone()
+    if row is None:
+        return None, None
+
+    fetched_at, body = row
+    ttl = cache_ttl(url, fetched_at)
+    if ttl is not None and time.time() - fetched_at > ttl:
+        return None, None
+    return body, fetched_at
+
+
+def cache_put(cache, url, body, fetched_at):
+    cache.execute('INSERT OR REPLACE INTO responses (url, fetched_at, body) VALUES (?, ?, ?)',
+                  (url, fetched_at, body))
+    cache.commit()
+
+
+def retry_delay(retry_after, attempt):
+    # waits as long as a 429's Retry-After asks, otherwise backs off exponentially
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return BACKOFF_FACTOR * 2 ** attempt
+
+
+def month_key(url):
+    # 'YYYY/MM' key of a monthly archive url in the stored history state
+    return '%04d/%02d' % archive_month(url)
+
+
+def history_paths(username):
+    base = os.path.join(CACHE_DIR, username.lower())
+    return base + '.json', base + '.parquet'
+
+
+def load_history(username):
+    """
+    loads the games stored by earlier runs
+    returns (DataFrame of end_time, rating and time_control, per-month state keyed by month_key)
+    or (None, {}) if nothing usable is stored
+    """
+    state_path, games_path = history_paths(username)
+    if not (os.path.exists(state_path) and os.path.exists(games_path)):
+        return None, {}
+
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+        history = pd.read_parquet(games_path)
+    except (OSError, ValueError) as e:
+        # unreadable files are rebuilt from scratch, like the legacy format below
+        print(f"Ignoring unreadable history for {username}: {e!r}")
+        return None, {}
+
+    # histories saved before per-month state was recorded can't tell which months are complete
+    if 'months' not in state:
+        return None, {}
+    months = state['months']
+
+    # the games file is replaced before the state, so a run stopped in between leaves games the
+    # state doesn't account for; they're dropped here and fetched again instead of duplicated
+    month_keys = pd.to_datetime(history['end_time'], unit='s').dt.strftime('%Y/%m')
+    month_hw = month_keys.map({key: month['hw'] for key, month in months.items() if month['hw'] is not None})
+    history = history[(history['end_time'] <= month_hw).to_numpy()].reset_index(drop=True)
+
+    return history, months
+
+
+def save_history(username, history, months):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    state_path, games_path = history_paths(username)
+
+    # each file is written in full under a temporary name and swapped in with os.replace,
+    # so an interrupted run never leaves a truncated file; the state goes last
+    history.astype(HISTORY_DTYPES).to_parquet(games_path + '.tmp', index=False, compression='zstd')
+    os.replace(games_path + '.tmp', games_path)
+
+    with open(state_path + '.tmp', 'w') as f:
+        json.dump({'months': months}, f)
+    os.replace(state_path + '.tmp', state_path)
+
+
+def archive_covered(archive_url, months):
+    # whether every game in the archive was already stored by an earlier run, which is only
+    # certain once the archive has been fetched after its month ended
+    month = months.get(month_key(archive_url))
+    return month is not None and month['complete']
+
+
+async def fetch_body(session, cache, limiter, url):
+    """
+    GETs a Chess.com API url, serving it from the on-disk cache while it is fresh
+    returns (status code, raw response body or None, time the body was fetched or None)
+    """
+    body, fetched_at = cache_get(cache, url)
+    if body is not None:
+        return 200, body, fetched_at
+
+    for attempt in range(MAX_RETRIES + 1):
+        retry_after = None
+        try:
+            async with limiter:
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        body = await response.read()
+                        break
+                    if response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                        return response.status, None, None
+                    retry_after = response.headers.get('Retry-After')
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt == MAX_RETRIES:
+                raise
+
+        await asyncio.sleep(retry_delay(retry_after, attempt))
+
+    fetched_at = time.time()
+    cache_put(cache, url, body, fetched_at)
+    return 200, body, fetched_at
+
+
+async def fetch_json(session, cache, limiter, url):
+    # same as fetch_body, but parses the body as JSON (orjson decodes the raw bytes directly)
+    status, body, _ = await fetch_body(session, cache, limiter, url)
+    return status, orjson.loads(body) if body is not None else None
+
+
+def parse_archive_games(body, username):
+    """
+    streams the games out of a raw archive body one at a time, keeping only the fields we need
+    username must already be lowercased
+    returns (end times, ratings, time controls) as NumPy arrays
+    """
+    end_times = np.empty(ARCHIVE_BUFFER_SIZE, dtype=np.int64)
+    ratings = np.empty(ARCHIVE_BUFFER_SIZE, dtype=np.int32)
+    time_controls = np.empty(ARCHIVE_BUFFER_SIZE, dtype=object)
+    count = 0
+
+    for game in ijson.items(body, 'games.item'):
+        if count == len(end_times):
+            # doubles the buffers so appends stay amortized O(1)
+            end_times = np.concatenate([end_times, np.empty_like(end_times)])
+            ratings = np.concatenate([ratings, np.empty_like(ratings)])
+            time_controls = np.concatenate([time_controls, np.empty_like(time_controls)])
+
+        # picks the player's rating from whichever side they played
+        side = game['white'] if game['white']['username'].lower() == username else game['black']
+
+        end_times[count] = game['end_time']
+        ratings[count] = side['rating']
+        time_controls[count] = game['time_control']
+        count += 1
+
+    return end_times[:count], ratings[:count], time_controls[:count]
+
+
+# fetches a player's rating history from Chess.com API
+# unknown players 404 on the stats endpoint, so this doubles as the username check
+async def get_player_stats(session, cache, limiter, username):
 
     username = username.lower()
+    if username in PLAYER_STATS_CACHE:
+        return PLAYER_STATS_CACHE[username]
 
     # chess.com API endpoints
     stats_url = f"https://api.chess.com/pub/player/{username}/stats"
     games_url = f"https://api.chess.com/pub/player/{username}/games/archives"
 
     try:
-        time.sleep(2) # 2-second delay
-
         # get player's current stats
-        stats_response = requests.get(stats_url, headers=headers)
+        stats_status, stats_data = await fetch_json(session, cache, limiter, stats_url)
         # prints status code and response for debugging
-        print(f"Stats URL Status Code: {stats_response.status_code}")
+        print(f"Stats URL Status Code: {stats_status}")
 
-        if stats_response.status_code != 200:
-            print(f"Error accessing stats: {stats_response.status_code}")
+        if stats_status != 200:
+            print(f"Error accessing stats: {stats_status}")
             return None, None
 
-        stats_data = stats_response.json()
-
-        time.sleep(2)
-
         # gets list of monthly game archives
-        archives_response = requests.get(games_url, headers=headers)
-        print(f"Archives URL Status Code: {archives_response.status_code}")
+        archives_status, archives_data = await fetch_json(session, cache, limiter, games_url)
+        print(f"Archives URL Status Code: {archives_status}")
 
-        if archives_response.status_code != 200:
-            print(f"Error accessing archives: {archives_response.status_code}")
+        if archives_status != 200:
+            print(f"Error accessing archives: {archives_status}")
             return None, None
 
-        archives_data = archives_response.json()
-
-        return stats_data, archives_data['archives']
+        # only successful lookups are kept, so transient failures can be retried
+        PLAYER_STATS_CACHE[username] = stats_data, tuple(archives_data['archives'])
+        return PLAYER_STATS_CACHE[username]
 
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching data: {e}")
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"Error fetching data: {e!r}")
         return None, None
     except ValueError as e:
         print(f"JSON parsing error: {e}")
         return None, None
 
 
+async def fetch_archives(username, max_archives, months=None):
+    """
+    fetches the player's most recent monthly archives concurrently over one shared session
+    archives the stored per-month state marks complete are skipped
+    returns (archive urls, results) where results maps each fetched url to (raw body, fetch time),
+    None or the raised exception
+    if interrupted (Ctrl-C), results only holds the archives that arrived before the interrupt
+    """
+    months = months or {}
+    sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    limiter = open_limiter()
+
+    with closing(open_cache()) as cache:
+        async with open_session() as session:
+            # the stats lookup doubles as the username check, on the same session as the archives
+            stats, archives = await get_player_stats(session, cache, limiter, username)
+            if not stats or not archives:
+                return None, None
+
+            # limits to most recent archives
+            archives = archives[-max_archives:] if max_archives else archives
+            to_fetch = [u for u in archives if not archive_covered(u, months)]
+            print(f"Fetching {len(to_fetch)} of {len(archives)} monthly archives...")
+
+            results = {}
+
+            async def fetch_archive(archive_url):
+                async with sem:
+                    try:
+                        status, archive_body, fetched_at = await fetch_body(session, cache, limiter, archive_url)
+                    except Exception as e:
+                        results[archive_url] = e
+                        return
+
+                    if status != 200:
+                        print(f"Error accessing archive {archive_url}: {status}")
+                        results[archive_url] = None
+                    else:
+                        results[archive_url] = archive_body, fetched_at
+
+            try:
+                await asyncio.gather(*(fetch_archive(u) for u in to_fetch))
+            except asyncio.CancelledError:
+                # Ctrl-C cancels the run; returning normally keeps the archives that already arrived
+                print("\nAnalysis interrupted by user. Processing available data...")
+
+    return archives, results
+
+
 def analyze_rating_progression(username, max_archives=3):
     """
     analyzes rating progression over time
     max_archives: maximum number of monthly archives to analyze (most recent ones)
     """
-    stats, archives = get_player_stats(username)
-    if not stats or not archives:
+    # normalized once; everything below compares against and keys on the lowercased name
+    username = username.lower()
+
+    history, months = load_history(username)
+
+    archives, results = run_async(fetch_archives(username, max_archives, months))
+    if archives is None:
         return None
 
-    # limits to most recent archives
-    archives = archives[-max_archives:] if max_archives else archives
+    window_start = month_bounds(*archive_month(archives[0]))[0]
+
     print(f"Analyzing {len(archives)} monthly archives...")
 
-    # stores rating data
-    rating_history = []
+    # stores one array per archive for each column, starting empty so they always concatenate
+    end_times = [np.empty(0, dtype=np.int64)]
+    ratings = [np.empty(0, dtype=np.int32)]
+    time_controls = [np.empty(0, dtype=object)]
+    # months whose stored state changed this run; failed archives keep their old state
+    updated = False
 
     # processes each monthly archive
     for i, archive_url in enumerate(archives):
+        if archive_url not in results:
+            if archive_covered(archive_url, months):
+                print(f"Archive {i + 1} already processed")
+            else:
+                print(f"Archive {i + 1} not fetched")
+            continue
+
+        result = results[archive_url]
+        if isinstance(result, BaseException):
+            print(f"Error fetching archive {archive_url}: {result!r}")
+            continue
+        if result is None:
+            continue
+
         try:
-            # adds delay between archive requests
-            time.sleep(2)  # 2 second delay
+            body, fetched_at = result
+            archive_end_times, archive_ratings, archive_time_controls = parse_archive_games(body, username)
+
+            key = month_key(archive_url)
+            stored_hw = months[key]['hw'] if key in months else None
+            if stored_hw is not None:
+                # drops games already stored by an earlier run; archives only ever gain newer games
+                new = archive_end_times > stored_hw
+                archive_end_times = archive_end_times[new]
+                archive_ratings = archive_ratings[new]
+                archive_time_controls = archive_time_controls[new]
+
+            print(f"Found {len(archive_end_times)} new games in archive {i + 1}")
+
+            end_times.append(archive_end_times)
+            ratings.append(archive_ratings)
+            time_controls.append(archive_time_controls)
+
+            if len(archive_end_times):
+                stored_hw = int(archive_end_times.max())
+            months[key] = {
+                'hw': stored_hw,
+                'complete': fetched_at >= month_bounds(*archive_month(archive_url))[1]
+            }
+            updated = True
 
-            print(f"Fetching archive {i + 1}/{len(archives)}...")
-            games_response = requests.get(archive_url, headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            })
+        except Exception as e:
+            print(f"Error during analysis: {e}")
 
-            if games_response.status_code != 200:
-                print(f"Error accessing archive {archive_url}: {games_response.status_code}")
-                continue
+    games = pd.DataFrame({
+        'end_time': np.concatenate(end_times),
+        'rating': np.concatenate(ratings),
+        'time_control': np.concatenate(time_controls)
+    })
+    if history is not None:
+        games = pd.concat([history, games], ignore_index=True)
 
-            monthly_games = games_response.json()['games']
-            print(f"Found {len(monthly_games)} games in archive {i + 1}")
+    if updated:
+        save_history(username, games, months)
 
-            for game in monthly_games:
-                date = datetime.fromtimestamp(game['end_time'])
+    # keeps only the requested months
+    games = games[games['end_time'].to_numpy() >= window_start]
 
-                if game['white']['username'].lower() == username.lower():
-                    rating = game['white']['rating']
-                else:
-                    rating = game['black']['rating']
+    if games.empty:
+        print("No rating history found")
+        return None
 
-                rating_history.append({
-                    'date': date,
-                    'rating': rating,
-                    'time_control': game['time_control']
-                })
+    print(f"Analyzing {len(games)} games...")
 
+    # sorts once by end time; every derived column is computed from the same ordered buffers
+    end_times = games['end_time'].to_numpy(dtype=np.int64)
+    order = np.argsort(end_times, kind='stable')
+    ratings = games['rating'].to_numpy()[order]
 
-        except KeyboardInterrupt:
-            print("\nAnalysis interrupted by user. Processing available data...")
+    # calculates rate of rating change
+    # float32 holds every rating difference exactly in half the bytes of pandas' float64,
+    # and keeps the NaN for the first game so the rolling windows start where they used to
+    rating_change = np.empty_like(ratings, dtype=np.float32)
+    rating_change[:1] = np.nan
+    np.subtract(ratings[1:], ratings[:-1], out=rating_change[1:])
+
+    # converts to DataFrame for analysis, with the rolling averages alongside
+    df = pd.DataFrame({
+        # one vectorized conversion of the raw unix end times into a tz-aware UTC datetime64 column
+        'date': pd.to_datetime(end_times[order], unit='s', utc=True),
+        'rating': ratings,
+        'time_control': pd.Categorical(games['time_control'].to_numpy()[order]),
+        'rating_change': rating_change,
+        'games_played': np.arange(len(ratings), dtype=np.int32),
+        'rolling_rating': rolling_mean(ratings, window=20),
+        'rating_change_rate': rolling_mean(rating_change, window=20)
+    })
 
-        except Exception as e:
-            print(f"Error during analysis: {e}")
+    return df
 
-    if not rating_history:
-        print("No rating history found")
-        return None
-    print(f"Analyzing {len(rating_history)} games...")
 
+def rolling_mean(values, window):
+    # trailing mean over full windows, NaN until the first window fills (same as pandas rolling().mean())
+    values = np.asarray(values, dtype=np.float64)
+    # bottleneck rejects windows longer than the data
+    if window > len(values):
+        return np.full(len(values), np.nan)
+    return bn.move_mean(values, window=window)
 
-    # converts to DataFrame for analysis
-    df = pd.DataFrame(rating_history)
 
-    # calculates rate of rating change
-    df = df.sort_values('date')
-    df['rating_change'] = df['rating'].diff()
-    df['games_played'] = range(len(df))
+def lttb_indices(x, y, n_out):
+    """
+    downsamples a series with Largest-Triangle-Three-Buckets
+    keeps the first and last points, plus the point of each bucket in between that forms the
+    largest triangle with the previously kept point and the average of the next bucket
+    returns the indices of the kept points
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
 
-    # calculates rolling averages
-    df['rolling_rating'] = df['rating'].rolling(window=20).mean()
-    df['rating_change_rate'] = df['rating_change'].rolling(window=20).mean()
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
 
-    return df
+    # boundaries of the n_out - 2 buckets between the first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    kept = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # the last bucket looks ahead to the final point only
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs((x[kept] - avg_x) * (y[start:end] - y[kept])
+                      - (x[kept] - x[start:end]) * (avg_y - y[kept]))
+        kept = start + int(np.argmax(area))
+        indices[i + 1] = kept
 
+    return indices
 
-def plot_rating_progression(df):
-    # creates visualization of rating progression
 
-    plt.figure(figsize=(12, 6))
+def plot_rating_progression(df, outfile='rating.png', show=False):
+    """
+    creates visualization of rating progression
+    outfile: path the figure is saved to
+    show: also open the figure in an interactive window
+    """
+    fig = plt.figure(figsize=(12, 6))
+
+    # long histories are downsampled; the moving average is already smooth and is plotted in full
+    games, ratings = df['games_played'].to_numpy(), df['rating'].to_numpy()
+    if len(df) > MAX_PLOT_POINTS:
+        kept = lttb_indices(games, ratings, MAX_PLOT_POINTS)
+        games, ratings = games[kept], ratings[kept]
 
     # plots rating over time
     plt.subplot(2, 1, 1)
-    plt.plot(df['games_played'], df['rating'], 'b-', alpha=0.3, label='Actual Rating')
+    plt.plot(games, ratings, 'b-', alpha=0.3, label='Actual Rating')
     plt.plot(df['games_played'], df['rolling_rating'], 'r-', label='20-game Moving Average')
     plt.xlabel('Games Played')
     plt.ylabel('Rating')
@@ -152,36 +564,64 @@ def plot_rating_progression(df):
     plt.legend()
 
     plt.tight_layout()
-    plt.show()
+    fig.savefig(outfile, dpi=100, bbox_inches='tight')
+    print(f"Saved rating plot to {outfile}")
+
+    if show:
+        plt.show()
+    plt.close(fig)
+
+
+@njit
+def plateau_bounds(rolling_change, threshold):
+    """
+    single pass over the rolling change; a plateau starts at the first game below the threshold
+    and ends at the first game back above it
+    a plateau still running at the last game has no end and isn't reported
+    returns the start and end indices of each plateau
+    """
+    n = rolling_change.shape[0]
+    starts = np.empty(n, np.int64)
+    ends = np.empty(n, np.int64)
+    count = 0
+    start = -1
+
+    for i in range(n):
+        # NaN (before the first full window) never counts as a plateau
+        inside = abs(rolling_change[i]) < threshold
+        if inside and start == -1:
+            start = i
+        elif not inside and start != -1:
+            starts[count] = start
+            ends[count] = i
+            count += 1
+            start = -1
+
+    return starts[:count], ends[:count]
 
 
 def find_rating_plateaus(df, window=50, threshold=5):
     # identifies periods where rating progress slows significantly
 
-    df['rolling_change'] = df['rating_change'].rolling(window=window).mean()
-    plateaus = []
-
-    current_plateau = None
-    for index, row in df.iterrows():
-        if abs(row['rolling_change']) < threshold:
-            if not current_plateau:
-                current_plateau = {
-                    'start_rating': row['rating'],
-                    'start_game': row['games_played'],
-                    'start_date': row['date'] ## added to pinpoint exactly which games the plateaus occur
-                }
-        elif current_plateau:
-            plateaus.append({
-                'start_rating': current_plateau['start_rating'],
-                'end_rating': row['rating'],
-                'games_span': row['games_played'] - current_plateau['start_game'],
-                'start_game_number': current_plateau['start_game'], # added to tell the start game number and end
-                # game number in which the plateau occurs
-                'end_game_number': row['games_played'],
-                'start_date': current_plateau['start_date'],
-                'end_date': row['date']
-            })
-            current_plateau = None
+    rolling_change = rolling_mean(df['rating_change'].to_numpy(), window=window)
+    df['rolling_change'] = rolling_change
+
+    starts, ends = plateau_bounds(rolling_change, threshold)
+
+    ratings = df['rating'].to_numpy()
+    games = df['games_played'].to_numpy()
+    dates = df['date'].array
+
+    plateaus = [{
+        'start_rating': ratings[s],
+        'end_rating': ratings[e],
+        'games_span': games[e] - games[s],
+        'start_game_number': games[s], # added to tell the start game number and end
+        # game number in which the plateau occurs
+        'end_game_number': games[e],
+        'start_date': dates[s], ## added to pinpoint exactly which games the plateaus occur
+        'end_date': dates[e]
+    } for s, e in zip(starts, ends)]
 
     return plateaus
 
@@ -189,39 +629,25 @@ def find_rating_plateaus(df, window=50, threshold=5):
 def calculate_progress_metrics(df):
     # calculates various metrics about rating progression
 
+    ratings = df['rating'].to_numpy()
+    total_games = ratings.shape[0]
+    initial_rating = int(ratings[0])
+    final_rating = int(ratings[-1])
+
     metrics = {
-        'total_games': len(df),
-        'initial_rating': df['rating'].iloc[0],
-        'final_rating': df['rating'].iloc[-1],
-        'total_gain': df['rating'].iloc[-1] - df['rating'].iloc[0],
-        'average_gain_per_game': (df['rating'].iloc[-1] - df['rating'].iloc[0]) / len(df),
-        'max_rating': df['rating'].max(),
-        'min_rating': df['rating'].min(),
-        'rating_volatility': df['rating'].std()
+        'total_games': total_games,
+        'initial_rating': initial_rating,
+        'final_rating': final_rating,
+        'total_gain': final_rating - initial_rating,
+        'average_gain_per_game': (final_rating - initial_rating) / total_games,
+        'max_rating': int(ratings.max()),
+        'min_rating': int(ratings.min()),
+        # sample standard deviation, same as pandas' std(): NaN (without warnings) for a single game
+        'rating_volatility': float(ratings.std(ddof=1)) if total_games > 1 else float('nan')
     }
 
     return metrics
 
-def verify_username(username):
-    # checks if a Chess.com username exists and is accessible
-
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    profile_url = f"https://api.chess.com/pub/player/{username}"
-    response = requests.get(profile_url, headers=headers)
-    print(f"Profile URL: {profile_url}")
-    print(f"Status Code: {response.status_code}")
-
-    if response.status_code == 200:
-        data = response.json()
-        print(f"Player found: {data.get('username')}")
-        return True
-    else:
-        print(f"Player not found or error occurred. Status: {response.status_code}")
-        return False
-
-
 ######################################################
 def main():
 
@@ -230,32 +656,32 @@ def main():
 
     max_months = 3
 
-    print(f"Verifying username '{username}'...")
-    if verify_username(username):
-        print(f"Analyzing data for {username}...")
-        df = analyze_rating_progression(username, max_archives=max_months)
-
-        if df is not None:
-            # prints overall metrics
-            metrics = calculate_progress_metrics(df)
-            print("\nOverall Metrics:")
-            for key, value in metrics.items():
-                print(f"{key}: {value}")
-
-            # finds plateaus
-            plateaus = find_rating_plateaus(df, window=30, threshold=3)
-            print("\nRating Plateaus:")
-            for plateau in plateaus:
-                print(f"Plateau at rating {plateau['start_rating']} to {plateau['end_rating']}, "
-                      f"lasting {plateau['games_span']} games, "
-                      f"from {plateau['start_game_number']} to {plateau['end_game_number']}")
-
-            # creates the visualization
-            plot_rating_progression(df)
-        else:
-            print("Failed to fetch data")
-    else:
+    # the analysis verifies the username itself, in the same run and session as the archive fetches
+    print(f"Analyzing data for {username}...")
+    df = analyze_rating_progression(username, max_archives=max_months)
+
+    if df is not None:
+        # prints overall metrics
+        metrics = calculate_progress_metrics(df)
+        print("\nOverall Metrics:")
+        for key, value in metrics.items():
+            print(f"{key}: {value}")
+
+        # finds plateaus
+        plateaus = find_rating_plateaus(df, window=30, threshold=3)
+        print("\nRating Plateaus:")
+        for plateau in plateaus:
+            print(f"Plateau at rating {plateau['start_rating']} to {plateau['end_rating']}, "
+                  f"lasting {plateau['games_span']} games, "
+                  f"from {plateau['start_game_number']} to {plateau['end_game_number']}")
+
+        # creates the visualization
+        plot_rating_progression(df, show=not HEADLESS)
+    elif username.lower() not in PLAYER_STATS_CACHE:
+        # only successful stats lookups are memoized, so the username doesn't exist or isn't accessible
         print("Please check the username and try again")
+    else:
+        print("Failed to fetch data")
 
 
 # runs script